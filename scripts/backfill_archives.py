@@ -1,28 +1,166 @@
 #!/usr/bin/env python3
-"""Backfill archive snapshots for Japanese datasets from git history."""
-import json, os, subprocess, sys, argparse
+"""Backfill archive snapshots for Japanese datasets from git history.
+
+Works in a blobless clone (`git clone --filter=blob:none`): blobs are fetched
+on demand by `git cat-file`, so only the days being backfilled are downloaded.
+"""
+import io, json, os, queue, subprocess, sys, argparse, threading
 from collections import OrderedDict
-from typing import List, Tuple, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Tuple, Dict, Optional, Set
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 DATA_FILE = "docs/data/japanese_datasets.json"
 ARCHIVE_DIR = "docs/data/archive"
 
-def run_git(args: List[str]) -> str:
+def dumps_json(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+def loads_json(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def write_bytes(path: str, payload: bytes):
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
     try:
-        r = subprocess.run(["git", *args], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        return r.stdout.decode("utf-8", errors="replace").strip()
-    except subprocess.CalledProcessError as e:
-        print("Git failed:", "git", *args)
-        print(e.stderr.decode("utf-8", errors="replace"))
-        sys.exit(1)
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+class GitCatFile:
+    """Persistent `git cat-file --batch` process for reading blobs at given commits.
+
+    Together with the streamed `git log` in get_commits() and one
+    resolve_blobs() call, the git process count does not grow with history depth.
+    """
+    def __init__(self):
+        self.proc = None
+
+    def __enter__(self):
+        self.proc = subprocess.Popen(["git", "cat-file", "--batch"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        self.out = io.BufferedReader(self.proc.stdout)
+        return self
+
+    def __exit__(self, *exc):
+        self.proc.stdin.close()
+        self.out.close()
+        self.proc.wait()
+        return False
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self.out.read(size)
+        if len(data) != size:
+            raise EOFError("git cat-file closed unexpectedly")
+        return data
+
+    def fetch_object(self, spec: str) -> bytes:
+        self.proc.stdin.write(f"{spec}\n".encode("utf-8"))
+        header = self.out.readline().decode("utf-8", errors="replace").split()
+        if len(header) != 3 or header[1] != "blob":
+            raise ValueError(f"Cannot read {spec} ({' '.join(header)})")
+        body = self._read_exact(int(header[2]))
+        self._read_exact(1)  # trailing newline
+        return body
+
+class ArchiveWriter:
+    """Background thread writing queued (path, payload) pairs so disk I/O overlaps fetch and parse.
+
+    Statuses are marked "created" when a write is queued, not when it lands.
+    The thread keeps draining the queue after a failed write, and the first
+    error is re-raised on exit, so a failed write makes backfill() raise
+    instead of returning statuses that don't match the disk.
+    """
+    def __init__(self, maxsize: int = 8):
+        self._queue: "queue.Queue[Optional[Tuple[str, bytes]]]" = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.error: Optional[Exception] = None
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None and exc_type is None:
+            raise self.error
+        return False
+
+    def put(self, path: str, payload: bytes):
+        self._queue.put((path, payload))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self.error is None:
+                try:
+                    write_bytes(*item)
+                except Exception as e:
+                    self.error = e
 
-def get_commits() -> List[Tuple[str, str]]:
-    out = run_git(["log", "--pretty=format:%H %ad", "--date=short", "--", DATA_FILE])
+def resolve_blobs(specs: List[str]) -> List[Optional[str]]:
+    """Map each `<rev>:<path>` to its blob id (None if missing) with one `git cat-file --batch-check`."""
+    if not specs:
+        return []
+    r = subprocess.run(["git", "cat-file", "--batch-check=%(objectname) %(objecttype)"],
+                       input="".join(f"{spec}\n" for spec in specs).encode("utf-8"),
+                       stdout=subprocess.PIPE, check=True)
+    oids = []
+    for line in r.stdout.decode("utf-8", errors="replace").splitlines():
+        parts = line.split()
+        oids.append(parts[0] if len(parts) == 2 and parts[1] == "blob" else None)
+    return oids
+
+class CatFilePool:
+    """Hands each worker thread its own GitCatFile, opened on first use."""
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._opened: List[GitCatFile] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for catfile in self._opened:
+            catfile.__exit__(None, None, None)
+        return False
+
+    def get(self) -> GitCatFile:
+        catfile = getattr(self._local, "catfile", None)
+        if catfile is None:
+            catfile = GitCatFile().__enter__()
+            with self._lock:
+                self._opened.append(catfile)
+            self._local.catfile = catfile
+        return catfile
+
+def get_commits(since: Optional[str] = None) -> List[Tuple[str, str]]:
+    args = ["log", "--pretty=format:%H %ad", "--date=short"]
+    if since:
+        args.append(f"--since={since}")
+    args += ["--", DATA_FILE]
+    proc = subprocess.Popen(["git", *args], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     commits = []
-    for line in out.splitlines():
+    for line in proc.stdout:
         parts = line.split()
         if len(parts) >= 2:
-            commits.append((parts[0], parts[1]))
+            commits.append((parts[0].decode("ascii"), parts[1].decode("ascii")))
+    err = proc.stderr.read()
+    if proc.wait() != 0:
+        print("Git failed:", "git", *args)
+        print(err.decode("utf-8", errors="replace"))
+        sys.exit(1)
     return commits
 
 def choose_daily(commits: List[Tuple[str, str]], strategy: str) -> OrderedDict:
@@ -39,7 +177,7 @@ def choose_daily(commits: List[Tuple[str, str]], strategy: str) -> OrderedDict:
     return mapping
 
 def load_dataset(raw: str) -> Dict:
-    data = json.loads(raw)
+    data = loads_json(raw)
     if "datasets" not in data:
         raise ValueError("Missing 'datasets' key")
     return data
@@ -52,51 +190,86 @@ def compute_statistics(datasets: List[Dict]) -> Dict:
         "multilingual_count": sum(1 for d in datasets if len(d.get("languages",[]))>1),
     }
 
-def backfill(mapping: OrderedDict, dry_run: bool) -> Dict[str,Dict[str,str]]:
+def archive_names(date_str: str) -> Tuple[str, str]:
+    yyyymmdd = date_str.replace('-','')
+    return f"japanese_datasets_{yyyymmdd}.json", f"statistics_{yyyymmdd}.json"
+
+def backfill(mapping: OrderedDict, dry_run: bool, workers: Optional[int] = None) -> Dict[str,Dict[str,str]]:
     os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    with os.scandir(ARCHIVE_DIR) as it:
+        existing = {e.name for e in it}
     results: Dict[str,Dict[str,str]] = {}
+    todo: List[Tuple[str, str]] = []
     for date_str, sha in mapping.items():
-        yyyymmdd = date_str.replace('-','')
-        ds_name = f"japanese_datasets_{yyyymmdd}.json"
-        st_name = f"statistics_{yyyymmdd}.json"
-        ds_path = os.path.join(ARCHIVE_DIR, ds_name)
-        st_path = os.path.join(ARCHIVE_DIR, st_name)
-        status = {"date": date_str, "commit": sha, "dataset": "skip", "stats": "skip"}
-        need_ds = not os.path.exists(ds_path)
-        need_st = not os.path.exists(st_path)
-        if not (need_ds or need_st):
-            status["note"] = "present"
-            results[date_str] = status
-            continue
-        if dry_run:
-            status["dataset"] = "would_create" if need_ds else "exists"
-            status["stats"] = "would_create" if need_st else "exists"
+        ds_name, st_name = archive_names(date_str)
+        if ds_name in existing and st_name in existing:
+            results[date_str] = dict(new_status(date_str, sha), note="present")
+        else:
+            todo.append((date_str, sha))
+    if dry_run:
+        for date_str, sha in todo:
+            ds_name, st_name = archive_names(date_str)
+            status = new_status(date_str, sha)
+            status["dataset"] = "exists" if ds_name in existing else "would_create"
+            status["stats"] = "exists" if st_name in existing else "would_create"
             results[date_str] = status
-            continue
-        raw = run_git(["show", f"{sha}:{DATA_FILE}"])
-        try:
-            data = load_dataset(raw)
-        except ValueError as e:
+    elif todo:
+        # git log -- DATA_FILE only lists commits that change the file, so days share
+        # a blob only when a revert or re-add restores earlier content; such days
+        # are fetched and parsed once
+        groups: Dict[str, List[Tuple[str, str]]] = OrderedDict()
+        for (date_str, sha), oid in zip(todo, resolve_blobs([f"{sha}:{DATA_FILE}" for _, sha in todo])):
+            if oid is None:
+                status = new_status(date_str, sha)
+                status["error"] = f"Cannot read {sha}:{DATA_FILE} (missing)"
+                results[date_str] = status
+            else:
+                groups.setdefault(oid, []).append((date_str, sha))
+        with ArchiveWriter() as writer, CatFilePool() as pool, ThreadPoolExecutor(max_workers=workers or default_workers()) as ex:
+            futures = [ex.submit(_process_blob, oid, days, existing, pool, writer) for oid, days in groups.items()]
+            for fut in as_completed(futures):
+                for status in fut.result():
+                    results[status["date"]] = status
+    return {d: results[d] for d in mapping}
+
+def default_workers() -> int:
+    return min(8, os.cpu_count() or 1)
+
+def new_status(date_str: str, sha: str) -> Dict[str,str]:
+    return {"date": date_str, "commit": sha, "dataset": "skip", "stats": "skip"}
+
+def _process_blob(oid: str, days: List[Tuple[str, str]], existing: Set[str], pool: CatFilePool, writer: ArchiveWriter) -> List[Dict[str,str]]:
+    statuses = [new_status(date_str, sha) for date_str, sha in days]
+    try:
+        raw = pool.get().fetch_object(oid).decode("utf-8", "replace")
+        data = load_dataset(raw)
+    except ValueError as e:
+        for status in statuses:
             status["error"] = str(e)
-            results[date_str] = status
-            continue
-        datasets = data.get("datasets", [])
-        if need_ds:
-            with open(ds_path,'w',encoding='utf-8') as f:
-                json.dump(data,f,ensure_ascii=False,indent=2)
+        return statuses
+    payload = None
+    stats = None
+    for status in statuses:
+        date_str = status["date"]
+        ds_name, st_name = archive_names(date_str)
+        if ds_name not in existing:
+            if payload is None:
+                payload = dumps_json(data)
+            writer.put(os.path.join(ARCHIVE_DIR, ds_name), payload)
+            existing.add(ds_name)
             status["dataset"] = "created"
         else:
             status["dataset"] = "exists"
-        if need_st:
-            stats = compute_statistics(datasets)
+        if st_name not in existing:
+            if stats is None:
+                stats = compute_statistics(data.get("datasets", []))
             doc = {"last_updated": f"{date_str}T00:00:00", "statistics": stats}
-            with open(st_path,'w',encoding='utf-8') as f:
-                json.dump(doc,f,ensure_ascii=False,indent=2)
+            writer.put(os.path.join(ARCHIVE_DIR, st_name), dumps_json(doc))
+            existing.add(st_name)
             status["stats"] = "created"
         else:
             status["stats"] = "exists"
-        results[date_str] = status
-    return results
+    return statuses
 
 def summary(results: Dict[str,Dict[str,str]], dry_run: bool):
     created_ds = sum(1 for r in results.values() if r.get("dataset") == "created")
@@ -121,17 +294,19 @@ def main():
     p = argparse.ArgumentParser(description="Backfill Japanese dataset archives")
     p.add_argument('--dry-run', action='store_true')
     p.add_argument('--strategy', choices=['last','first'], default='last')
+    p.add_argument('--since', metavar='YYYY-MM-DD', help='only scan history after this date')
+    p.add_argument('--workers', type=int, default=default_workers(), help='parallel snapshots to fetch and parse')
     args = p.parse_args()
     if not os.path.isdir('.git'):
         print('Run at repo root.')
         sys.exit(1)
-    commits = get_commits()
+    commits = get_commits(since=args.since)
     if not commits:
         print('No commits for data file.')
         sys.exit(0)
     mapping = choose_daily(commits, strategy=args.strategy)
     print(f"Found {len(mapping)} distinct days in history.")
-    results = backfill(mapping, dry_run=args.dry_run)
+    results = backfill(mapping, dry_run=args.dry_run, workers=args.workers)
     summary(results, args.dry_run)
     if args.dry_run:
         print('Dry-run complete.')
@@ -2,19 +2,110 @@
 """
 Script to collect and organize Japanese language datasets from Hugging Face
 """
+import argparse
+import csv
 import json
 import os
+import pickle
+import shutil
 import sys
 import time
+from collections import Counter
 from datetime import datetime
-from typing import List, Dict
-import pandas as pd
-from huggingface_hub import HfApi, list_datasets
-from tqdm import tqdm
+from typing import List, Dict, Optional
+
+CACHE_DIR = "docs/data/.cache"
+
+# Listing properties used to build dataset_info; requesting only these keeps
+# each page of the Hub listing small (full=True also returns card data and files)
+LIST_EXPAND = ["author", "createdAt", "lastModified", "downloads", "likes", "tags", "description"]
+
+# Tag prefix -> dataset_info list that collects the tag's value
+TAG_BUCKETS = {
+    "language": "languages",
+    "task_categories": "tasks",
+    "size_categories": "size_categories",
+}
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_json(obj) -> bytes:
+    """Serialize to pretty-printed UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def write_bytes(path: str, payload: bytes):
+    """Write a pre-serialized payload with as few write() calls as possible."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def link_or_copy(src: str, dst: str):
+    """Replace dst with a hard link to src, copying if the filesystem can't link."""
+    try:
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def load_cache(cache_file: str) -> Optional[List[Dict]]:
+    """Load a cached dataset list, treating a missing or unreadable file as a miss."""
+    try:
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (EOFError, pickle.UnpicklingError) as e:
+        print(f"Ignoring unreadable cache {cache_file}: {e}")
+        return None
+
+
+def save_cache(cache_file: str, datasets: List[Dict]):
+    """Atomically write today's cache and remove the files of earlier days."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_file = cache_file + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(datasets, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, cache_file)
+
+    keep = os.path.basename(cache_file)
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith("datasets_") and name != keep:
+            os.remove(os.path.join(CACHE_DIR, name))
+
+
+def collect_japanese_datasets(max_retries: int = 3, force_refresh: bool = False) -> List[Dict]:
+    """Collect datasets that include Japanese language from Hugging Face.
+
+    The collected list is cached per day under CACHE_DIR, so re-runs on the
+    same day skip the Hub listing unless force_refresh is set.
+    """
+    cache_file = os.path.join(CACHE_DIR, f"datasets_{datetime.now().strftime('%Y%m%d')}.pkl")
+    if not force_refresh:
+        datasets = load_cache(cache_file)
+        if datasets is not None:
+            print(f"Loaded {len(datasets)} datasets from cache: {cache_file}")
+            return datasets
+
+    # Imported here so the module loads without the Hub client and progress bar
+    from huggingface_hub import HfApi, list_datasets
+    from tqdm import tqdm
 
-
-def collect_japanese_datasets(max_retries: int = 3) -> List[Dict]:
-    """Collect datasets that include Japanese language from Hugging Face."""
     api = HfApi()
     datasets = []
 
@@ -24,11 +115,18 @@ def collect_japanese_datasets(max_retries: int = 3) -> List[Dict]:
     for attempt in range(max_retries):
         try:
             print(f"Attempt {attempt + 1}/{max_retries}...")
-            dataset_list = list(list_datasets(language="ja", full=True))
-            print(f"Found {len(dataset_list)} datasets in total")
-
-            for dataset in tqdm(dataset_list):
+            datasets = []
+            # Stream the listing instead of materializing every DatasetInfo object first
+            for dataset in tqdm(list_datasets(language="ja", expand=LIST_EXPAND)):
                 try:
+                    # Filter: Include Japanese datasets with up to 100 languages,
+                    # checked on the raw tags before building the record
+                    tags = dataset.tags or ()
+                    if "language:ja" not in tags:
+                        continue
+                    if sum(1 for tag in tags if tag.startswith("language:")) > 100:
+                        continue
+
                     dataset_info = {
                         "id": dataset.id,
                         "author": dataset.author,
@@ -36,7 +134,7 @@ def collect_japanese_datasets(max_retries: int = 3) -> List[Dict]:
                         "last_modified": str(dataset.last_modified) if dataset.last_modified else None,
                         "downloads": dataset.downloads if hasattr(dataset, 'downloads') else 0,
                         "likes": dataset.likes if hasattr(dataset, 'likes') else 0,
-                        "tags": list(dataset.tags) if dataset.tags else [],
+                        "tags": list(tags),
                         "description": dataset.description if hasattr(dataset, 'description') else "",
                         "url": f"https://huggingface.co/datasets/{dataset.id}",
                         "languages": [],
@@ -45,23 +143,17 @@ def collect_japanese_datasets(max_retries: int = 3) -> List[Dict]:
                     }
 
                     # Extract language, task, and size information from tags
-                    if dataset.tags:
-                        for tag in dataset.tags:
-                            if tag.startswith("language:"):
-                                dataset_info["languages"].append(tag.replace("language:", ""))
-                            elif tag.startswith("task_categories:"):
-                                dataset_info["tasks"].append(tag.replace("task_categories:", ""))
-                            elif tag.startswith("size_categories:"):
-                                dataset_info["size_categories"].append(tag.replace("size_categories:", ""))
-
-                    # Filter: Include Japanese datasets with up to 100 languages
-                    if "ja" in dataset_info["languages"]:
-                        # Japanese + max 100 languages
-                        if len(dataset_info["languages"]) <= 100:
-                            datasets.append(dataset_info)
+                    for tag in tags:
+                        prefix, sep, value = tag.partition(":")
+                        bucket = TAG_BUCKETS.get(prefix)
+                        if bucket and sep:
+                            dataset_info[bucket].append(value)
+
+                    datasets.append(dataset_info)
                 except Exception as e:
                     print(f"Error processing dataset {dataset.id}: {e}")
                     continue
+            print(f"Found {len(datasets)} Japanese datasets")
 
             # Successfully completed, break out of retry loop
             break
@@ -79,6 +171,9 @@ def collect_japanese_datasets(max_retries: int = 3) -> List[Dict]:
                 # Return empty list instead of raising error to preserve existing data
                 return []
 
+    if datasets:
+        save_cache(cache_file, datasets)
+
     return datasets
 
 
@@ -98,75 +193,80 @@ def process_and_save_datasets(datasets: List[Dict], output_dir: str = "docs/data
         "datasets": datasets
     }
 
+    # Serialize once; the archive and the main file get identical bytes
+    payload = dumps_json(current_data)
+
     # 1. Save current data to archive (by date)
     archive_file = os.path.join(archive_dir, f"japanese_datasets_{timestamp}.json")
-    with open(archive_file, 'w', encoding='utf-8') as f:
-        json.dump(current_data, f, ensure_ascii=False, indent=2)
+    write_bytes(archive_file, payload)
     print(f"Archive saved: {archive_file}")
 
-    # 2. Save latest data to main file
+    # 2. Save latest data to main file (same content as the archive)
     output_file = os.path.join(output_dir, "japanese_datasets.json")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(current_data, f, ensure_ascii=False, indent=2)
+    link_or_copy(archive_file, output_file)
 
     print(f"\nSaved information for {len(datasets)} datasets.")
     print(f"File location: {output_file}")
 
     # 3. Also save as CSV (for backup)
     if datasets:
-        df = pd.DataFrame(datasets)
-        csv_file = os.path.join(output_dir, "japanese_datasets.csv")
-        df.to_csv(csv_file, index=False, encoding='utf-8-sig')
-        print(f"CSV file: {csv_file}")
+        # Columns in first-seen key order, like a DataFrame built from the same dicts
+        fieldnames = list(dict.fromkeys(k for d in datasets for k in d))
 
-        # Archive CSV as well
+        # Write the dated archive CSV, then link the main CSV to it (same as the JSON pair)
         archive_csv = os.path.join(archive_dir, f"japanese_datasets_{timestamp}.csv")
-        df.to_csv(archive_csv, index=False, encoding='utf-8-sig')
+        with open(archive_csv, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator='\n')
+            writer.writeheader()
+            writer.writerows(datasets)
+
+        csv_file = os.path.join(output_dir, "japanese_datasets.csv")
+        link_or_copy(archive_csv, csv_file)
+        print(f"CSV file: {csv_file}")
 
     return output_file
 
 
 def generate_statistics(datasets: List[Dict]) -> Dict:
-    """Generate statistics information for datasets."""
-    stats = {
-        "total_datasets": len(datasets),
-        "total_downloads": sum(d.get("downloads", 0) for d in datasets),
-        "total_likes": sum(d.get("likes", 0) for d in datasets),
-        "top_authors": {},
-        "top_tasks": {},
-        "multilingual_count": 0
-    }
+    """Generate statistics information for datasets in a single pass."""
+    total_downloads = total_likes = multilingual_count = 0
+    authors = Counter()
+    tasks = Counter()
 
-    # Statistics by author
     for dataset in datasets:
-        author = dataset.get("author", "unknown")
-        stats["top_authors"][author] = stats["top_authors"].get(author, 0) + 1
-
-        # Statistics by task
-        for task in dataset.get("tasks", []):
-            stats["top_tasks"][task] = stats["top_tasks"].get(task, 0) + 1
-
+        total_downloads += dataset.get("downloads", 0)
+        total_likes += dataset.get("likes", 0)
         # Count multilingual datasets
-        if len(dataset.get("languages", [])) > 1:
-            stats["multilingual_count"] += 1
+        if len(dataset.get("languages", ())) > 1:
+            multilingual_count += 1
+        # Statistics by author and by task
+        authors[dataset.get("author", "unknown")] += 1
+        tasks.update(dataset.get("tasks", ()))
 
-    # Keep only top 10
-    stats["top_authors"] = dict(sorted(stats["top_authors"].items(),
-                                       key=lambda x: x[1], reverse=True)[:10])
-    stats["top_tasks"] = dict(sorted(stats["top_tasks"].items(),
-                                     key=lambda x: x[1], reverse=True)[:10])
-
-    return stats
+    return {
+        "total_datasets": len(datasets),
+        "total_downloads": total_downloads,
+        "total_likes": total_likes,
+        # Keep only top 10
+        "top_authors": dict(authors.most_common(10)),
+        "top_tasks": dict(tasks.most_common(10)),
+        "multilingual_count": multilingual_count
+    }
 
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Collect Japanese datasets from Hugging Face")
+    parser.add_argument('--force-refresh', action='store_true',
+                        help="ignore today's cached dataset list and query the Hub again")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("Japanese Dataset Collection Tool")
     print("=" * 60)
 
     # Collect datasets
-    datasets = collect_japanese_datasets()
+    datasets = collect_japanese_datasets(force_refresh=args.force_refresh)
 
     if not datasets:
         print("Warning: No datasets collected.")
@@ -187,15 +287,15 @@ def main():
         "statistics": stats
     }
 
+    stats_payload = dumps_json(stats_data)
+
     # Save current statistics
     stats_file = "docs/data/statistics.json"
-    with open(stats_file, 'w', encoding='utf-8') as f:
-        json.dump(stats_data, f, ensure_ascii=False, indent=2)
+    write_bytes(stats_file, stats_payload)
 
     # Save statistics to archive as well
     archive_stats_file = f"docs/data/archive/statistics_{timestamp}.json"
-    with open(archive_stats_file, 'w', encoding='utf-8') as f:
-        json.dump(stats_data, f, ensure_ascii=False, indent=2)
+    write_bytes(archive_stats_file, stats_payload)
 
     print(f"\nStatistics:")
     print(f"  - Total datasets: {stats['total_datasets']}")